@@ -0,0 +1,37 @@
+import importlib.util
+import pathlib
+import sys
+
+import pytest
+
+# The script name has dashes, so load it by path
+_PATH = pathlib.Path(__file__).with_name("zkevm-worst-case.py")
+_spec = importlib.util.spec_from_file_location("zkevm_worst_case", _PATH)
+zk = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = zk
+_spec.loader.exec_module(zk)
+
+
+@pytest.mark.parametrize("e", [0, 1, 2, 10, 20, 52, 53, 60, 64, 200])
+def test_next_power_of_2_exact_power(e):
+    assert zk.next_power_of_2(2**e) == 2**e
+
+
+@pytest.mark.parametrize("e", [1, 2, 10, 20, 52, 53, 60, 64, 200])
+def test_next_power_of_2_power_plus_one(e):
+    assert zk.next_power_of_2(2**e + 1) == 2**(e+1)
+
+
+def test_next_power_of_2_small():
+    assert zk.next_power_of_2(0) == 1
+    assert zk.next_power_of_2(1) == 1
+    assert zk.next_power_of_2(3) == 4
+
+
+@pytest.mark.parametrize("degree", [3, 5, 9, 10])
+@pytest.mark.parametrize("k", [18, 20, 24, 26, 30])
+def test_log2_mem_floors_like_to_gb(degree, k):
+    for advice in range(0, 1500, 7):
+        exact = zk.to_gb(zk.estimate_mem(degree, k, zk.FIXED_TOTAL, advice))
+        log2_mem = zk.estimate_mem_log2(degree, k, zk.FIXED_TOTAL, advice)
+        assert zk.log2_to_gb(log2_mem) == exact
@@ -2,11 +2,19 @@
 
 import math
 import sys
-from copy import deepcopy
 from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
 import pygame
+from numba import njit, prange
+from scipy.optimize import Bounds, LinearConstraint, milp
 from pygame.locals import *
 
+# Numba keys its on-disk cache by source file but records the module name,
+# so a cache written while this file is loaded under another name (e.g. via
+# importlib) breaks later script runs.  Only cache when run as a script.
+_NUMBA_CACHE = __name__ == '__main__'
+
 # Renamed state circuit to rw for consistency with table name
 
 circuits_tables = [
@@ -39,8 +47,15 @@ circuit_colors = {
     "pi": "orangered",
     "ecc": "gray",
     "sig": "gray",
+    "block": "steelblue",
+    "u8": "plum",
+    "u10": "orchid",
+    "u16": "mediumpurple",
 }
 
+# Parsed once; pygame.Color does not need pygame.init()
+_PYG_COLORS = {name: pygame.Color(color) for name, color in circuit_colors.items()}
+
 # Notes:
 # MAX_CODESIZE = 0x6000
 
@@ -133,34 +148,41 @@ adv_cols = {
 }
 
 
+@lru_cache(maxsize=None)
 def next_power_of_2(x):
-    return 1 if x == 0 else 2**math.ceil(math.log2(x))
+    """Smallest power of 2 not below x, computed exactly on integers"""
+    return 1 << (x-1).bit_length() if x > 1 else 1
 
 
 field_bytes = 32
 
 
+@lru_cache(maxsize=None)
 def estimate_mem(degree, k, fixed, advice):
     """Estimate peak memory only considering fixed and advice columns"""
     c_f = fixed
     c_a = advice
     m_e = 4 + c_f + c_a
     e = next_power_of_2(degree - 1)
-    return e * m_e * 2**k * field_bytes
+    return e * m_e * (1 << k) * field_bytes
+
+
+def estimate_mem_log2(degree, k, fixed, advice):
+    """log2 of estimate_mem, computed in floating point for parameter sweeps"""
+    m_e = 4 + fixed + advice
+    e_log = next_power_of_2(degree - 1).bit_length() - 1
+    return e_log + math.log2(m_e) + k + math.log2(field_bytes)
+
+
+_MAX_ROWS_PER_GAS = max(v for v in rows_per_gas.values() if v)
 
 
 def max_gas(k):
     """Figure out the maximum amount of gas we can prove in the worst case"""
-    max_rows_per_gas = 0
-    for _, value in rows_per_gas.items():
-        if not value:
-            continue
-        if value > max_rows_per_gas:
-            max_rows_per_gas = value
-    return 2**k // max_rows_per_gas
+    return (1 << k) // _MAX_ROWS_PER_GAS
 
 
-@dataclass
+@dataclass(slots=True)
 class Region:
     name: str
     width: int
@@ -168,19 +190,74 @@ class Region:
     x: int = -1
     y: int = -1
 
-    def overlap(self, other) -> bool:
-        return (self.x <= other.x and self.x+self.width > other.x) and \
-                (self.y <= other.y and self.y+self.height > other.y)
-
+    def clone(self) -> 'Region':
+        return Region(self.name, self.width, self.height)
 
-@dataclass
-class Point:
-    x: int
-    y: int
+    def overlap(self, other) -> bool:
+        return (self.x < other.x+other.width and other.x < self.x+self.width) and \
+                (self.y < other.y+other.height and other.y < self.y+self.height)
+
+    def contains(self, other) -> bool:
+        return (self.x <= other.x and other.x+other.width <= self.x+self.width) and \
+                (self.y <= other.y and other.y+other.height <= self.y+self.height)
+
+
+@dataclass(eq=False)
+class RegionArray:
+    """Regions stored as one array per field"""
+    names: list
+    widths: np.ndarray
+    heights: np.ndarray
+    xs: np.ndarray
+    ys: np.ndarray
+
+    @classmethod
+    def from_regions(cls, regions):
+        return cls([r.name for r in regions],
+                   np.fromiter((r.width for r in regions), dtype=np.int64),
+                   np.fromiter((r.height for r in regions), dtype=np.int64),
+                   np.fromiter((r.x for r in regions), dtype=np.int64),
+                   np.fromiter((r.y for r in regions), dtype=np.int64))
+
+    def take(self, indices):
+        return RegionArray([self.names[i] for i in indices],
+                           self.widths[indices], self.heights[indices],
+                           self.xs[indices], self.ys[indices])
+
+    def region(self, i):
+        """Copy of the i-th region as a Region"""
+        return Region(self.names[i], int(self.widths[i]), int(self.heights[i]),
+                      int(self.xs[i]), int(self.ys[i]))
+
+    def to_regions(self):
+        """Copy of the regions as a list of Region.  Changes to the copies are
+        not written back to the arrays"""
+        return [Region(*fields) for fields in
+                zip(self.names, self.widths.tolist(), self.heights.tolist(),
+                    self.xs.tolist(), self.ys.tolist())]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return repr(self.to_regions())
+
+
+def as_region_array(regions):
+    if isinstance(regions, RegionArray):
+        return regions
+    return RegionArray.from_regions(regions)
+
+
+def as_region_list(regions):
+    if isinstance(regions, RegionArray):
+        return regions.to_regions()
+    return regions
 
 
 def solve_v1(k, regions):
     """Find a solution to the region placing.  Halo2 algorithm"""
+    regions = as_region_list(regions)
     width = 0
     for i in range(0, len(regions)):
         region = regions[i]
@@ -193,6 +270,42 @@ def solve_v1(k, regions):
     return regions
 
 
+def solve_v2_shelf(k, regions):
+    """
+    Find a solution to the region placing.  Shelf Best-Height-Fit.
+    Each shelf is a group of columns where regions are stacked vertically.
+    Regions are placed in decreasing height order into the shelf that leaves
+    the least height unused, or into a new shelf to the right when none fits.
+    Only the rightmost shelf can grow wider to fit a region.
+    """
+
+    n = 1 << k
+    regions = sorted(as_region_list(regions), key=lambda r: -r.height)
+    shelves = []  # [x, width, y] where y is the next free row
+    for region in regions:
+        best = None
+        for shelf in shelves:
+            _, width, y = shelf
+            if region.height > n - y:
+                continue
+            if region.width > width and shelf is not shelves[-1]:
+                continue
+            if best is None or y > best[2]:
+                best = shelf
+        if best is None:
+            x = shelves[-1][0] + shelves[-1][1] if shelves else 0
+            best = [x, 0, 0]
+            shelves.append(best)
+        region.x = best[0]
+        region.y = best[2]
+        best[1] = max(best[1], region.width)
+        best[2] += region.height
+
+    if not check_valid(k, regions):
+        print("Invalid solution")
+    return regions
+
+
 def solve_v3(k, regions):
     """
     Find a solution to the region placing.  Simple algorithm.
@@ -201,65 +314,322 @@ def solve_v3(k, regions):
     independent columns can be stacked vertically
     """
 
-    n = 2**k
-    # Sort by height
-    regions = sorted(regions, key=lambda r: -r.height)
-    position = Point(0, 0)
-    width = 0
-    for i in range(0, len(regions)):
-        region = regions[i]
+    n = 1 << k
+    # Sort by height, then by width
+    regions = as_region_array(regions)
+    regions = regions.take(np.lexsort((-regions.widths, -regions.heights)))
+    _solve_v3_nb(n, regions.widths, regions.heights, regions.xs, regions.ys)
+
+    if not check_valid(k, regions):
+        print("Invalid solution")
+    return regions
+
+
+@njit(cache=_NUMBA_CACHE)
+def _solve_v3_nb(n, widths, heights, xs, ys):
+    """Place the regions in the given order, writing the result to xs and ys"""
+    # Column of each region, and width and used rows of each column
+    col = np.zeros(len(widths), dtype=np.int64)
+    col_width = np.zeros(len(widths), dtype=np.int64)
+    col_y = np.zeros(len(widths), dtype=np.int64)
+    cols = 0
+    for i in range(len(widths)):
         # If the region fits below the last one, add it, otherwise start at
         # offset 0 to the right (in new columns)
-        if position.y + region.height < n:
-            region.y = position.y
-            region.x = position.x
-            position.y += region.height
-            if width < region.width:
-                width = region.width
-        else:
-            position.x += width
-            region.y = 0
-            region.x = position.x
-            position.y = region.height
-            width = region.width
+        if cols == 0 or n - col_y[cols-1] < heights[i]:
+            cols += 1
+        col[i] = cols-1
+        col_y[cols-1] += heights[i]
+        col_width[cols-1] = max(col_width[cols-1], widths[i])
+
+    # Compaction: move each region to the leftmost earlier column with enough
+    # rows left that is already wide enough for it.
+    for i in range(len(widths)):
+        for c in range(col[i]):
+            if n - col_y[c] >= heights[i] and col_width[c] >= widths[i]:
+                col_y[col[i]] -= heights[i]
+                col_y[c] += heights[i]
+                col[i] = c
+                break
+
+    # Columns that lost regions may have become narrower or empty
+    col_width[:] = 0
+    for i in range(len(widths)):
+        col_width[col[i]] = max(col_width[col[i]], widths[i])
+    col_x = np.zeros(cols, dtype=np.int64)
+    for c in range(1, cols):
+        col_x[c] = col_x[c-1] + col_width[c-1]
+    col_y[:] = 0
+    for i in range(len(widths)):
+        xs[i] = col_x[col[i]]
+        ys[i] = col_y[col[i]]
+        col_y[col[i]] += heights[i]
+
+
+@njit(parallel=True, cache=_NUMBA_CACHE)
+def _sweep_v3_nb(ns, widths, heights, xs, ys):
+    """Run the v3 placement for each row of sorted regions, writing the
+    result to the rows of xs and ys"""
+    for row in prange(len(ns)):
+        _solve_v3_nb(ns[row], widths[row], heights[row], xs[row], ys[row])
+
+
+def sweep_v3(ks):
+    """Advice columns of the v3 layout for the worst case gas of each k"""
+    regions = []
+    for k in ks:
+        r = RegionArray.from_regions(get_regions(max_gas(k)))
+        regions.append(r.take(np.lexsort((-r.widths, -r.heights))))
+    ns = np.array([1 << k for k in ks], dtype=np.int64)
+    widths = np.stack([r.widths for r in regions])
+    heights = np.stack([r.heights for r in regions])
+    xs = np.zeros_like(widths)
+    ys = np.zeros_like(widths)
+    _sweep_v3_nb(ns, widths, heights, xs, ys)
+
+    advice = []
+    for k, r, x, y in zip(ks, regions, xs, ys):
+        r.xs[:] = x
+        r.ys[:] = y
+        if not check_valid(k, r):
+            print(f"Invalid solution for k = {k}")
+        advice.append(get_advice(r))
+    return advice
+
+
+def solve_v4(k, regions):
+    """
+    Find a solution to the region placing.  MaxRects Best-Short-Side-Fit.
+    Keep the list of maximal free rectangles.  Each region is placed at the
+    corner of the free rectangle that leaves the shortest side unused, and
+    every free rectangle it intersects is split into the maximal rectangles
+    around it.  The width is unbounded: all regions side by side always fit.
+    """
+
+    n = 1 << k
+    free = [Region(None, math.inf, n, 0, 0)]
+    regions = sorted(as_region_list(regions), key=lambda r: -max(r.width, r.height))
+    for region in regions:
+        best = None
+        best_fit = None
+        for rect in free:
+            if region.width > rect.width or region.height > rect.height:
+                continue
+            dw = rect.width - region.width
+            dh = rect.height - region.height
+            fit = (min(dw, dh), max(dw, dh))
+            if best is None or fit < best_fit:
+                best = rect
+                best_fit = fit
+        if best is None:
+            # Too tall for the 2^k rows; check_valid will complain
+            best = Region(None, region.width, region.height,
+                          sum(r.width for r in regions), 0)
+        region.x = best.x
+        region.y = best.y
+
+        splits = []
+        for rect in free:
+            if not rect.overlap(region):
+                splits.append(rect)
+                continue
+            if region.x > rect.x:
+                splits.append(Region(None, region.x - rect.x, rect.height,
+                                     rect.x, rect.y))
+            if region.x + region.width < rect.x + rect.width:
+                splits.append(Region(None, rect.x + rect.width - region.x - region.width,
+                                     rect.height, region.x + region.width, rect.y))
+            if region.y > rect.y:
+                splits.append(Region(None, rect.width, region.y - rect.y,
+                                     rect.x, rect.y))
+            if region.y + region.height < rect.y + rect.height:
+                splits.append(Region(None, rect.width,
+                                     rect.y + rect.height - region.y - region.height,
+                                     rect.x, region.y + region.height))
+        # Drop free rectangles contained in another one
+        free = []
+        for i, rect in enumerate(splits):
+            if not any(other.contains(rect) and (j < i or not rect.contains(other))
+                       for j, other in enumerate(splits) if j != i):
+                free.append(rect)
 
     if not check_valid(k, regions):
         print("Invalid solution")
     return regions
 
 
+def _v5_fallback(k, regions, reason):
+    """Layout from solve_v3, as a list of Region, when the MILP one is unusable"""
+    print(f"{reason}; falling back to the V3 layouter")
+    return solve_v3(k, regions).to_regions()
+
+
+def solve_v5_opt(k, regions, time_limit=60):
+    """
+    Find a solution to the region placing.  Exact MILP.
+    Minimize the total width W subject to x_i + w_i <= W and, for every pair
+    of regions, at least one of "i left of j", "j left of i", "i below j" or
+    "j below i" holding (big-M disjunction).  Positions are integer columns
+    and rows.  The solver only meets its constraints up to a tolerance, so
+    the layout is rebuilt from one relation per pair that the rounded
+    solution really satisfies, with a longest path pass over the relation
+    graph.  Falls back to the solve_v3 layout (announced on stdout) if that
+    doesn't give a valid layout.
+    """
+
+    n = 1 << k
+    regions = list(as_region_list(regions))
+    # Empty regions cover no cells and can go anywhere
+    placed = [r for r in regions if r.width > 0 and r.height > 0]
+    for r in regions:
+        r.x = 0
+        r.y = 0
+    m = len(placed)
+    if m == 0:
+        return regions
+    w = np.array([r.width for r in placed], dtype=float)
+    h = np.array([r.height for r in placed], dtype=float)
+    max_width = w.sum()
+    pairs = [(i, j) for i in range(m) for j in range(i+1, m)]
+
+    # Variables: x (m), y (m), W, then left/right/below/above for each pair
+    nvars = 2*m + 1 + 4*len(pairs)
+    W = 2*m
+    c = np.zeros(nvars)
+    c[W] = 1
+    rows, lb, ub = [], [], []
+
+    def add(coefs, lo, hi):
+        row = np.zeros(nvars)
+        for var, coef in coefs:
+            row[var] = coef
+        rows.append(row)
+        lb.append(lo)
+        ub.append(hi)
+
+    for i in range(m):
+        add([(W, 1), (i, -1)], w[i], np.inf)
+    for p, (i, j) in enumerate(pairs):
+        left, right, below, above = (2*m + 1 + 4*p + d for d in range(4))
+        # x_i + w_i <= x_j + M (1 - left), and the symmetric ones
+        add([(i, 1), (j, -1), (left, max_width)], -np.inf, max_width - w[i])
+        add([(j, 1), (i, -1), (right, max_width)], -np.inf, max_width - w[j])
+        add([(m+i, 1), (m+j, -1), (below, n)], -np.inf, n - h[i])
+        add([(m+j, 1), (m+i, -1), (above, n)], -np.inf, n - h[j])
+        add([(left, 1), (right, 1), (below, 1), (above, 1)], 1, np.inf)
+
+    lower = np.zeros(nvars)
+    upper = np.ones(nvars)
+    upper[:m] = max_width - w
+    upper[m:2*m] = n - h
+    upper[W] = max_width
+    integrality = np.ones(nvars)
+    integrality[W] = 0
+    res = milp(c, constraints=LinearConstraint(np.array(rows), lb, ub),
+               integrality=integrality, bounds=Bounds(lower, upper),
+               options={"time_limit": time_limit})
+    if res.x is None:
+        return _v5_fallback(k, regions, f"No MILP solution: {res.message}")
+
+    # For each pair, one relation that holds exactly on the rounded solution:
+    # edges[axis][i] lists the regions j that start after region i ends.
+    xs = np.rint(res.x[:m]).astype(np.int64).tolist()
+    ys = np.rint(res.x[m:2*m]).astype(np.int64).tolist()
+    edges = {"x": [[] for _ in range(m)], "y": [[] for _ in range(m)]}
+    for i, j in pairs:
+        if xs[i] + placed[i].width <= xs[j]:
+            edges["x"][i].append(j)
+        elif xs[j] + placed[j].width <= xs[i]:
+            edges["x"][j].append(i)
+        elif ys[i] + placed[i].height <= ys[j]:
+            edges["y"][i].append(j)
+        elif ys[j] + placed[j].height <= ys[i]:
+            edges["y"][j].append(i)
+        else:
+            return _v5_fallback(k, regions,
+                                f"MILP solution overlaps {placed[i]} and {placed[j]}")
+
+    # Smallest positions satisfying the relations: longest path in
+    # topological order
+    for axis, size in (("x", "width"), ("y", "height")):
+        indegree = [0] * m
+        for i in range(m):
+            for j in edges[axis][i]:
+                indegree[j] += 1
+        queue = [i for i in range(m) if indegree[i] == 0]
+        for i in queue:
+            end = getattr(placed[i], axis) + getattr(placed[i], size)
+            for j in edges[axis][i]:
+                setattr(placed[j], axis, max(getattr(placed[j], axis), end))
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    queue.append(j)
+        if len(queue) < m:
+            return _v5_fallback(k, regions, f"MILP relations have a cycle in {axis}")
+
+    if not check_valid(k, regions):
+        return _v5_fallback(k, regions, "Invalid MILP solution")
+    return regions
+
+
+@njit(cache=_NUMBA_CACHE)
+def _find_overlap_nb(xs, ys, widths, heights):
+    """First pair of overlapping regions, or (-1, -1).  Empty regions cover no
+    cells"""
+    for i in range(len(xs)):
+        if widths[i] == 0 or heights[i] == 0:
+            continue
+        for j in range(i+1, len(xs)):
+            if widths[j] == 0 or heights[j] == 0:
+                continue
+            if (xs[i] < xs[j] + widths[j] and xs[j] < xs[i] + widths[i]) and \
+                    (ys[i] < ys[j] + heights[j] and ys[j] < ys[i] + heights[i]):
+                return i, j
+    return -1, -1
+
+
 def check_valid(k, regions):
-    n = 2**k
+    n = 1 << k
+    arrays = as_region_array(regions)
+    x, y, w, h = arrays.xs, arrays.ys, arrays.widths, arrays.heights
+
     # All regions within 0..2^k height
-    for region in regions:
-        if region.y + region.height > n:
-            print(f"Region {region} over 2^k height")
-            return False
+    over = y + h > n
+    if over.any():
+        print(f"Region {arrays.region(int(over.argmax()))} over 2^k height")
+        return False
 
     # No region overlap
-    for i in range(0, len(regions)):
-        for j in range(i+1, len(regions)):
-            if regions[i].overlap(regions[j]):
-                print(f"Overlapping regions {regions[i]} and {regions[j]}")
-                return False
+    i, j = _find_overlap_nb(x, y, w, h)
+    if i >= 0:
+        print(f"Overlapping regions {arrays.region(i)} and {arrays.region(j)}")
+        return False
 
     return True
 
 
+def rasterize(img, regions, n, max_width):
+    """Paint the regions into an RGB image array of shape (h, w, 3)"""
+    h, w, _ = img.shape
+    regions = as_region_array(regions)
+    sx = w / max_width
+    sy = h / n
+    x0 = (regions.xs * sx).astype(np.int64)
+    y0 = (regions.ys * sy).astype(np.int64)
+    x1 = x0 + (regions.widths * sx).astype(np.int64)
+    y1 = y0 + (regions.heights * sy).astype(np.int64)
+    colors = np.array([tuple(_PYG_COLORS[name])[:3]
+                       for name in regions.names], dtype=np.uint8)
+    for i in range(0, len(regions)):
+        img[y0[i]:y1[i], x0[i]:x1[i]] = colors[i]
+
+
 def draw1(regions, n, max_width):
     w, h = (1280, 720)
     window = pygame.display.set_mode((w, h))
-    window.fill(pygame.Color("white"))
-
-    for i in range(0, len(regions)):
-        region = regions[i]
-        name = region.name
-        x = region.x / max_width * w
-        y = region.y / n * h
-        width = region.width / max_width * w
-        height = region.height / n * h
-        pygame.draw.rect(window, pygame.Color(circuit_colors[name]),
-                         [x, y, width, height], 0)
+    img = np.full((h, w, 3), 255, dtype=np.uint8)
+    rasterize(img, regions, n, max_width)
+    pygame.surfarray.blit_array(window, img.swapaxes(0, 1))
     pygame.display.update()
 
     running = True
@@ -273,22 +643,11 @@ def draw1(regions, n, max_width):
 def draw2(regions1, regions2, n, max_width):
     w, h = (1024, 1024)
     window = pygame.display.set_mode((w, h))
-    window.fill(pygame.Color("white"))
-
-    def draw_regions(offset, w, h, regions):
-        for i in range(0, len(regions)):
-            region = regions[i]
-            name = region.name
-            x = region.x / max_width * w
-            y = region.y / n * h
-            width = region.width / max_width * w
-            height = region.height / n * h
-            pygame.draw.rect(window, pygame.Color(circuit_colors[name]),
-                             [x, y + offset, width, height], 0)
-
-    draw_regions(0, w, h//2, regions1)
+    img = np.full((h, w, 3), 255, dtype=np.uint8)
+    rasterize(img[:h//2], regions1, n, max_width)
+    rasterize(img[h//2:], regions2, n, max_width)
+    pygame.surfarray.blit_array(window, img.swapaxes(0, 1))
     pygame.draw.line(window, pygame.Color("black"), (0, h//2-1), (w, h//2-1))
-    draw_regions(h//2, w, h//2, regions2)
     pygame.display.update()
 
     running = True
@@ -299,11 +658,10 @@ def draw2(regions1, regions2, n, max_width):
                 running = False
 
 
-def get_regions(gas):
-    # Collect regions where width and height count advice cells.  We have one
-    # region per subcircuit. We merge subcircuit and their table into the same
-    # region.
-    regions = []
+@lru_cache(maxsize=None)
+def _region_shapes(gas):
+    """(name, width, height) of each region for the gas, see get_regions"""
+    shapes = []
     for (circuit, table) in circuits_tables:
         width = 0
         if circuit:
@@ -313,20 +671,24 @@ def get_regions(gas):
         name = circuit
         if not circuit:
             name = table
-        rows_gas = rows_per_gas[name]
-        if not rows_gas:
+        rows_gas = rows_per_gas.get(name)
+        if rows_gas is None:
             continue
-        rows = int(gas * rows_gas)
-        try:
-            rows = max(rows, min_rows[name])
-        except KeyError:
-            pass
-        regions.append(Region(circuit, width, rows))
+        rows = max(int(gas * rows_gas), min_rows.get(name, 0))
+        shapes.append((name, width, rows))
 
-    return regions
+    return tuple(shapes)
 
 
-def get_fixed():
+def get_regions(gas):
+    # Collect regions where width and height count advice cells.  We have one
+    # region per subcircuit. We merge subcircuit and their table into the same
+    # region.  Only the shapes are cached; every call returns new Regions
+    # that the solvers are free to place.
+    return [Region(name, width, height) for name, width, height in _region_shapes(gas)]
+
+
+def _compute_fixed():
     """Count the total number of fixed columns"""
     fixed = 0
     for (circuit, table) in circuits_tables:
@@ -337,23 +699,24 @@ def get_fixed():
     return fixed
 
 
+FIXED_TOTAL = _compute_fixed()
+
+
 def get_advice(regions):
     """Count the total number of advice columns required for the layouter regions"""
-    advice = 0
-    for region in regions:
-        max_col = region.x + region.width
-        if max_col > advice:
-            advice = max_col
-    return advice
+    if isinstance(regions, RegionArray):
+        return int((regions.xs + regions.widths).max(initial=0))
+    return max(map(lambda r: r.x + r.width, regions), default=0)
 
 
 def cell_usage(k, regions):
     width = get_advice(regions)
-    height = 2**k
+    height = 1 << k
     area = width * height
-    used_cells = 0
-    for region in regions:
-        used_cells += region.width * region.height
+    if isinstance(regions, RegionArray):
+        used_cells = int((regions.widths * regions.heights).sum())
+    else:
+        used_cells = sum(map(lambda r: r.width * r.height, regions))
 
     return area, used_cells
 
@@ -362,6 +725,27 @@ def to_gb(x):
     return x//1024//1024//1024
 
 
+def log2_to_gb(log2_x):
+    """to_gb of 2**log2_x.  The float power can land just below an exact
+    number of GiB, so nudge it up before flooring"""
+    return math.floor(2**(log2_x - 30) * (1 + 1e-12))
+
+
+def report(title, k, degree, regions):
+    """Print the advice, fixed, memory and area figures of a layout"""
+    print(regions)
+    advice = get_advice(regions)
+    fixed = FIXED_TOTAL
+
+    print(f"= {title} =")
+    print(f"advice = {advice}, fixed = {fixed}")
+    mem = estimate_mem(degree, k, fixed, advice)
+    print(f"Mem estimation: {to_gb(mem)} GiB")
+    area, used_cells = cell_usage(k, regions)
+    print(f"Area usage: {used_cells/area * 100}%")
+    return advice
+
+
 def main():
     pygame.init()
 
@@ -375,32 +759,32 @@ def main():
 
     regions = get_regions(gas)
 
-    regions_v1 = solve_v1(k, deepcopy(regions))
-    print(regions_v1)
-    advice_v1 = get_advice(regions_v1)
-    fixed_v1 = get_fixed()
+    # Only the layouts that get drawn are kept around
+    regions_v1 = solve_v1(k, [r.clone() for r in regions])
+    advice_v1 = report("Current", k, degree, regions_v1)
 
-    print("= Current =")
-    print(f"advice = {advice_v1}, fixed = {fixed_v1}")
-    mem_v1 = estimate_mem(degree, k, fixed_v1, advice_v1)
-    print(f"Mem estimation: {to_gb(mem_v1)} GiB")
-    area_v1, used_cells_v1 = cell_usage(k, regions_v1)
-    print(f"Area usage: {used_cells_v1/area_v1 * 100}%")
+    print("")
+    report("V2 shelf", k, degree, solve_v2_shelf(k, [r.clone() for r in regions]))
+
+    print("")
+    regions_v3 = solve_v3(k, [r.clone() for r in regions])
+    report("V3", k, degree, regions_v3)
 
     print("")
-    regions_v3 = solve_v3(k, deepcopy(regions))
-    print(regions_v3)
-    advice_v3 = get_advice(regions_v3)
-    fixed_v3 = get_fixed()
-
-    print("= V3 =")
-    print(f"advice = {advice_v3}, fixed = {fixed_v3}")
-    mem_v3 = estimate_mem(degree, k, fixed_v3, advice_v3)
-    print(f"Mem estimation: {to_gb(mem_v3)} GiB")
-    area_v3, used_cells_v3 = cell_usage(k, regions_v3)
-    print(f"Area usage: {used_cells_v3/area_v3 * 100}%")
-
-    draw2(regions_v1, regions_v3, 2**k, advice_v1)
+    report("V4 MaxRects", k, degree, solve_v4(k, [r.clone() for r in regions]))
+
+    print("")
+    report("V5 MILP", k, degree, solve_v5_opt(k, [r.clone() for r in regions]))
+    del regions
+
+    print("")
+    print("= V3 sweep =")
+    ks = list(range(20, 31))
+    for k_i, advice in zip(ks, sweep_v3(ks)):
+        log2_mem = estimate_mem_log2(degree, k_i, FIXED_TOTAL, advice)
+        print(f"k = {k_i}: advice = {advice}, Mem estimation: {log2_to_gb(log2_mem)} GiB")
+
+    draw2(regions_v1, regions_v3, 1 << k, advice_v1)
 
 
 if __name__ == '__main__':